@@ -8,6 +8,8 @@ Author: MAAYTHM (https://github.com/MAAYTHM)
 """
 
 import argparse
+import asyncio
+import io
 import os
 import sys
 import platform
@@ -15,8 +17,12 @@ import subprocess
 import shutil
 import time
 import signal
-import threading
 import shlex
+import functools
+import re
+import struct
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
 try:
@@ -27,27 +33,47 @@ except ImportError:
 
 DEFAULT_NTP_PORT = 123
 DEFAULT_NTP_SERVERS = ["pool.ntp.org", "time.nist.gov", "time.google.com"]
+_DEFAULT_FALLBACK_LINE = " ".join(DEFAULT_NTP_SERVERS)
+NTP_TIMEOUT = 2.0
+# Resend an unanswered NTP request after this long, within NTP_TIMEOUT
+NTP_RETRY_INTERVAL = 0.8
+NTP_MAX_DELAY = 1.0
+USE_RAW_NTP = True
 BACKUP_SUFFIX = ".dctimer.bak"
 VERBOSE = False
 QUIET = False
 COLORLESS = False
 
-NTP_TIME_holder = None
-Setting_time = None
-ntp_lock = threading.Lock()
+# NTP reference as an immutable (POSIX timestamp of the NTP time, monotonic
+# clock reading in ns when it was sampled) pair. Rebinding a module global is
+# atomic under the GIL, so readers take a consistent snapshot without a lock.
+# Any future read-modify-write of the reference needs a threading.Lock.
+_ntp_ref = (None, None)
+
+def _interp(base_ts, base_mono_ns, now_mono_ns):
+    return base_ts + (now_mono_ns - base_mono_ns) * 1e-9
+
+def get_virtual_ntp_timestamp():
+    ntp_timestamp, set_mono = _ntp_ref
+    if ntp_timestamp is None or set_mono is None:
+        return None
+    return _interp(ntp_timestamp, set_mono, time.monotonic_ns())
 
 def get_virtual_ntp_time():
-    with ntp_lock:
-        if NTP_TIME_holder is None or Setting_time is None:
-            return None
-        offset = datetime.now(timezone.utc) - Setting_time
-        return NTP_TIME_holder + offset
+    timestamp = get_virtual_ntp_timestamp()
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
 
-def update_ntp_reference(new_ntp_time):
-    global NTP_TIME_holder, Setting_time
-    with ntp_lock:
-        NTP_TIME_holder = new_ntp_time
-        Setting_time = datetime.now(timezone.utc)
+def update_ntp_reference(new_ntp_time, mono_ns=None):
+    # mono_ns is the monotonic reading taken when new_ntp_time was sampled;
+    # without it the reference is anchored to "now"
+    global _ntp_ref
+    _ntp_ref = (new_ntp_time.timestamp(), time.monotonic_ns() if mono_ns is None else mono_ns)
+
+# Module-level color codes read by the log helpers; Colors.enable()/disable()
+# rebind them and keep the Colors attributes in sync for external callers
+_C_RED = _C_GREEN = _C_YELLOW = _C_BLUE = _C_PURPLE = _C_CYAN = _C_BOLD = _C_END = _C_MAGENTA = ''
 
 class Colors:
     RED = ''
@@ -61,77 +87,140 @@ class Colors:
     MAGENTA = ''
     @staticmethod
     def enable():
-        Colors.RED = '\033[91m'
-        Colors.GREEN = '\033[92m'
-        Colors.YELLOW = '\033[93m'
-        Colors.BLUE = '\033[94m'
-        Colors.PURPLE = '\033[95m'
-        Colors.CYAN = '\033[96m'
-        Colors.BOLD = '\033[1m'
-        Colors.MAGENTA = '\033[35m'
-        Colors.END = '\033[0m'
+        global _C_RED, _C_GREEN, _C_YELLOW, _C_BLUE, _C_PURPLE, _C_CYAN, _C_BOLD, _C_END, _C_MAGENTA
+        _C_RED = Colors.RED = '\033[91m'
+        _C_GREEN = Colors.GREEN = '\033[92m'
+        _C_YELLOW = Colors.YELLOW = '\033[93m'
+        _C_BLUE = Colors.BLUE = '\033[94m'
+        _C_PURPLE = Colors.PURPLE = '\033[95m'
+        _C_CYAN = Colors.CYAN = '\033[96m'
+        _C_BOLD = Colors.BOLD = '\033[1m'
+        _C_MAGENTA = Colors.MAGENTA = '\033[35m'
+        _C_END = Colors.END = '\033[0m'
     @staticmethod
     def disable():
+        global _C_RED, _C_GREEN, _C_YELLOW, _C_BLUE, _C_PURPLE, _C_CYAN, _C_BOLD, _C_END, _C_MAGENTA
+        _C_RED = _C_GREEN = _C_YELLOW = _C_BLUE = _C_PURPLE = _C_CYAN = _C_BOLD = _C_END = _C_MAGENTA = ''
         Colors.RED = Colors.GREEN = Colors.YELLOW = Colors.BLUE = Colors.PURPLE = Colors.CYAN = Colors.BOLD = Colors.END = Colors.MAGENTA = ''
 
+# [second, "HH:MM:SS"] of the last log line; a racing update only recomputes
+_LAST_LOG_SEC = [0, ""]
+
 def log(message, level="INFO", color=""):
     if QUIET:
         return
-    timestamp = datetime.now().strftime("%H:%M:%S")
+    now = int(time.time())
+    if now != _LAST_LOG_SEC[0]:
+        lt = time.localtime(now)
+        _LAST_LOG_SEC[1] = f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}"
+        _LAST_LOG_SEC[0] = now
+    timestamp = _LAST_LOG_SEC[1]
     if color:
-        print(f"{color}[{timestamp}] {level}: {message}{Colors.END}")
+        print(f"{color}[{timestamp}] {level}: {message}{_C_END}")
     else:
         print(f"[{timestamp}] {level}: {message}")
 
-def verbose_log(message, level="INFO"):
+def verbose_log(fmt, *args, level="INFO"):
+    # %-style arguments are only formatted when the message is actually shown
     if not VERBOSE or QUIET:
         return
+    message = fmt % args if args else fmt
     color = {
-        "INFO": Colors.BLUE,
-        "WARNING": Colors.YELLOW,
-        "ERROR": Colors.RED,
-        "SUCCESS": Colors.GREEN,
-        "CMD": Colors.MAGENTA + Colors.BOLD
-    }.get(level, Colors.BLUE)
+        "INFO": _C_BLUE,
+        "WARNING": _C_YELLOW,
+        "ERROR": _C_RED,
+        "SUCCESS": _C_GREEN,
+        "CMD": _C_MAGENTA + _C_BOLD
+    }.get(level, _C_BLUE)
     log(message, f"VERBOSE-{level}", color)
 
-def error_log(message):
+def error_log(fmt, *args):
     if QUIET:
         return
-    log(message, "ERROR", Colors.RED)
+    log(fmt % args if args else fmt, "ERROR", _C_RED)
 
-def success_log(message):
+def success_log(fmt, *args):
     if QUIET:
         return
-    log(message, "SUCCESS", Colors.GREEN)
+    log(fmt % args if args else fmt, "SUCCESS", _C_GREEN)
 
-def warning_log(message):
+def warning_log(fmt, *args):
     if QUIET:
         return
-    log(message, "WARNING", Colors.YELLOW)
+    log(fmt % args if args else fmt, "WARNING", _C_YELLOW)
 
-def info_log(message):
+def info_log(fmt, *args):
     if QUIET:
         return
-    log(message, "INFO", Colors.BLUE)
+    log(fmt % args if args else fmt, "INFO", _C_BLUE)
+
+# Neither can change during the lifetime of the process
+_IS_LINUX = sys.platform.startswith("linux")
+_IS_ROOT = os.geteuid() == 0 if hasattr(os, "geteuid") else False
 
 def is_linux():
-    return sys.platform.startswith("linux")
+    return _IS_LINUX
 
 def is_root():
-    return os.geteuid() == 0 if hasattr(os, "geteuid") else False
+    return _IS_ROOT
+
+@functools.lru_cache(maxsize=None)
+def _which(name):
+    return shutil.which(name)
+
+@functools.lru_cache(maxsize=None)
+def _path_exists(path):
+    return os.path.exists(path)
+
+def _clear_probe_cache():
+    _which.cache_clear()
+    _path_exists.cache_clear()
+
+# Commands issued from several techniques and reset paths
+_CMD_TIMEDATECTL_ON = ("timedatectl", "set-ntp", "true")
+_CMD_TIMEDATECTL_OFF = ("timedatectl", "set-ntp", "off")
+_CMD_TIMEDATECTL_NTP_STATE = ("timedatectl", "show", "-p", "NTP", "--value")
+
+@functools.lru_cache(maxsize=256)
+def _fmt_cmd(cmd_tuple):
+    return ' '.join(shlex.quote(str(x)) for x in cmd_tuple)
+
+# Anything here means the user wants the shell to interpret the command
+_SHELL_METACHARS = frozenset("|&;<>$`*?~(){}[]#\n")
+# VAR=value prefix; only the shell turns it into an environment assignment
+_ENV_ASSIGN_RE = re.compile(r"^[A-Za-z_]\w*=")
+
+def _user_command_argv(argv):
+    """Return an argv list to exec directly, or None if the command needs /bin/sh.
+
+    A single argument is a quoted command line ("nxc ldap ...") and is split
+    here instead of by the shell. An empty list means there is nothing to run.
+    """
+    if any(c in _SHELL_METACHARS for arg in argv for c in arg):
+        return None
+    if len(argv) > 1:
+        cmd_args = list(argv)
+    else:
+        try:
+            cmd_args = shlex.split(argv[0])
+        except ValueError:
+            return None
+    if not cmd_args:
+        return cmd_args
+    # Builtins and keywords (cd, export, ...) have no executable to resolve
+    if _ENV_ASSIGN_RE.match(cmd_args[0]) or _which(cmd_args[0]) is None:
+        return None
+    return cmd_args
 
 def run_command(cmd, check=True, capture_output=True, shell=False, env=None, verbose_cmd=True):
     # verbose_cmd: whether to print the command in verbose mode
     if VERBOSE and not QUIET and verbose_cmd:
-        if isinstance(cmd, list):
-            verbose_log(f"Running command: {Colors.MAGENTA}{' '.join(shlex.quote(str(x)) for x in cmd)}{Colors.END}", level="CMD")
+        if isinstance(cmd, (list, tuple)):
+            verbose_log("Running command: %s%s%s", _C_MAGENTA, _fmt_cmd(tuple(cmd)), _C_END, level="CMD")
         else:
-            verbose_log(f"Running command: {Colors.MAGENTA}{cmd}{Colors.END}", level="CMD")
+            verbose_log("Running command: %s%s%s", _C_MAGENTA, cmd, _C_END, level="CMD")
     try:
         is_string_command = isinstance(cmd, str)
-        if env is None:
-            env = os.environ.copy()
         result = subprocess.run(
             cmd,
             shell=is_string_command,
@@ -142,101 +231,357 @@ def run_command(cmd, check=True, capture_output=True, shell=False, env=None, ver
         )
         if VERBOSE and not QUIET and capture_output and verbose_cmd:
             if result.stdout:
-                verbose_log(f"stdout: {result.stdout.strip()}", level="SUCCESS")
+                verbose_log("stdout: %s", result.stdout.strip(), level="SUCCESS")
             if result.stderr:
-                verbose_log(f"stderr: {result.stderr.strip()}", level="WARNING")
+                verbose_log("stderr: %s", result.stderr.strip(), level="WARNING")
         return result
     except subprocess.CalledProcessError as e:
         if not QUIET:
-            error_log(f"Command failed: {e}")
+            error_log("Command failed: %s", e)
         if VERBOSE and not QUIET and hasattr(e, 'stdout') and e.stdout:
-            verbose_log(f"Failed command output: {e.stdout}", level="ERROR")
+            verbose_log("Failed command output: %s", e.stdout, level="ERROR")
         if VERBOSE and not QUIET and hasattr(e, 'stderr') and e.stderr:
-            verbose_log(f"Failed command stderr: {e.stderr}", level="ERROR")
+            verbose_log("Failed command stderr: %s", e.stderr, level="ERROR")
         return None
 
+def _start_service(unit, config_changed=True):
+    # Returns (command, result) for the last systemctl call, so a failure names
+    # the step that actually failed
+    if not config_changed:
+        cmd = ("systemctl", "is-active", "--quiet", unit)
+        active = run_command(cmd, check=False, capture_output=True, verbose_cmd=True)
+        if active is not None and active.returncode == 0:
+            verbose_log("%s is already running with the current config", unit, level="INFO")
+            return _fmt_cmd(cmd), active
+    for cmd in (("systemctl", "restart", unit), ("systemctl", "enable", unit)):
+        result = run_command(cmd, check=False, capture_output=True, verbose_cmd=True)
+        if result is None or result.returncode != 0:
+            break
+    return _fmt_cmd(cmd), result
+
+def _copy_xattrs(src_path, dst_fd):
+    if not hasattr(os, "listxattr"):
+        return
+    try:
+        names = os.listxattr(src_path)
+    except OSError:
+        return
+    for name in names:
+        try:
+            os.setxattr(dst_fd, name, os.getxattr(src_path, name))
+        except OSError:
+            pass
+
+def _write_if_changed(path, content):
+    # Atomically replace path with content; returns False if it was already current.
+    # A symlink is followed so the link survives, and the replacement keeps the
+    # existing file's mode, owner and xattrs.
+    data = content.encode()
+    real_path = os.path.realpath(path)
+    try:
+        with open(real_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        st = None
+    tmp_path = real_path + ".tmp"
+    mode = st.st_mode & 0o7777 if st is not None else 0o644
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        try:
+            if st is not None:
+                os.fchown(fd, st.st_uid, st.st_gid)
+                os.fchmod(fd, mode)
+                _copy_xattrs(real_path, fd)
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, real_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+_NO_SYSTEMD_MARKER = "System has not been booted with systemd"
+
+def _reports_no_systemd(result):
+    return bool(result is not None and result.stderr and _NO_SYSTEMD_MARKER in result.stderr)
+
+def _command_error(message, result):
+    # Only the first stderr line, so the failure matrix stays one row per technique
+    if result is not None and result.stderr:
+        for line in result.stderr.splitlines():
+            line = line.strip()
+            if line:
+                return f"{message}: {line}"
+    return message
+
+_SMALL_FILE_LIMIT = 64 * 1024
+
+def _fast_copy_small(src, dst):
+    # Single read/write copy for small config files, preserving mode and times
+    st = os.stat(src)
+    if st.st_size > _SMALL_FILE_LIMIT:
+        shutil.copy2(src, dst)
+        return
+    with open(src, "rb") as f:
+        data = f.read()
+    fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, st.st_mode & 0o777)
+    try:
+        os.write(fd, data)
+        os.fchmod(fd, st.st_mode & 0o777)
+    finally:
+        os.close(fd)
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
 def backup_file(filepath):
     backup_path = f"{filepath}{BACKUP_SUFFIX}"
     if os.path.exists(backup_path):
-        verbose_log(f"Backup already exists: {backup_path}", level="WARNING")
-        verbose_log(f"Suggestion: Remove backup or restore before proceeding.", level="INFO")
+        verbose_log("Backup already exists: %s", backup_path, level="WARNING")
+        verbose_log("Suggestion: Remove backup or restore before proceeding.", level="INFO")
         return backup_path
     if os.path.exists(filepath):
         try:
-            shutil.copy2(filepath, backup_path)
-            verbose_log(f"Backed up {filepath} to {backup_path}", level="SUCCESS")
+            _fast_copy_small(filepath, backup_path)
+            verbose_log("Backed up %s to %s", filepath, backup_path, level="SUCCESS")
             return backup_path
         except Exception as e:
-            verbose_log(f"Failed to backup {filepath}: {e}", level="ERROR")
+            verbose_log("Failed to backup %s: %s", filepath, e, level="ERROR")
     else:
-        verbose_log(f"Config file {filepath} does not exist; skipping backup.", level="WARNING")
+        verbose_log("Config file %s does not exist; skipping backup.", filepath, level="WARNING")
     return None
 
 def restore_file(filepath):
     backup_path = f"{filepath}{BACKUP_SUFFIX}"
     if not os.path.exists(backup_path):
-        verbose_log(f"No backup found for {filepath}", level="WARNING")
-        verbose_log(f"Suggestion: Check if backup exists or restore manually.", level="INFO")
+        verbose_log("No backup found for %s", filepath, level="WARNING")
+        verbose_log("Suggestion: Check if backup exists or restore manually.", level="INFO")
         return False
     try:
-        shutil.copy2(backup_path, filepath)
+        _fast_copy_small(backup_path, filepath)
         os.remove(backup_path)
-        verbose_log(f"Restored {filepath} from backup", level="SUCCESS")
+        verbose_log("Restored %s from backup", filepath, level="SUCCESS")
         return True
     except Exception as e:
-        verbose_log(f"Failed to restore {filepath}: {e}", level="ERROR")
+        verbose_log("Failed to restore %s: %s", filepath, e, level="ERROR")
         return False
 
+_STDERR_TAIL_BYTES = 4096
+
+def _run_with_stderr_tail(cmd):
+    # stdout is inherited untouched; stderr is forwarded as it arrives and
+    # only its last few KB are kept for error-marker checks
+    sys.stdout.flush()
+    sys.stderr.flush()
+    proc = subprocess.Popen(cmd, stderr=subprocess.PIPE)
+    tail = b""
+    try:
+        with proc.stderr:
+            err_fd = proc.stderr.fileno()
+            while True:
+                chunk = os.read(err_fd, 65536)
+                if not chunk:
+                    break
+                sys.stderr.buffer.write(chunk)
+                sys.stderr.buffer.flush()
+                tail = (tail + chunk)[-_STDERR_TAIL_BYTES:]
+        return proc.wait(), tail
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+
 def get_env_ip():
     return os.environ.get("IP")
 
 def get_local_time():
     return datetime.now()
 
-def get_ntp_time(server, port=123):
+# Seconds between the NTP epoch (1900) and the Unix epoch (1970)
+NTP_EPOCH_DELTA = 2208988800
+# Client request: LI=0, VN=3, Mode=3, everything else zero
+_NTP_REQUEST = bytes([0x1b]) + b"\x00" * 47
+_NTPTimes = namedtuple("_NTPTimes", "orig_time recv_time tx_time dest_time")
+
+def _ntp_request(now):
+    # Stamp the transmit field; the server echoes it back as the originate
+    # timestamp, which ties a reply to the send it answers across resends
+    packet = bytearray(_NTP_REQUEST)
+    secs = now + NTP_EPOCH_DELTA
+    struct.pack_into("!II", packet, 40, int(secs), int((secs % 1) * 2**32))
+    return packet
+
+def _parse_ntp_packet(data, orig_time, dest_time):
+    if len(data) < 48:
+        raise ValueError(f"short NTP packet ({len(data)} bytes)")
+    mode = data[0] & 0x7
+    stratum = data[1]
+    if mode != 4:
+        raise ValueError(f"unexpected NTP mode {mode}")
+    if stratum == 0:
+        raise ValueError("kiss-of-death NTP reply")
+    orig_s, orig_f, recv_s, recv_f, tx_s, tx_f = struct.unpack_from("!6I", data, 24)
+    if tx_s == 0:
+        raise ValueError("NTP reply without transmit timestamp")
+    if orig_s:
+        orig_time = orig_s - NTP_EPOCH_DELTA + orig_f / 2**32
+    return _NTPTimes(
+        orig_time,
+        recv_s - NTP_EPOCH_DELTA + recv_f / 2**32,
+        tx_s - NTP_EPOCH_DELTA + tx_f / 2**32,
+        dest_time
+    )
+
+class _NTPClientProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.reply = asyncio.get_running_loop().create_future()
+    def datagram_received(self, data, addr):
+        if not self.reply.done():
+            self.reply.set_result((data, time.time(), time.monotonic_ns()))
+    def error_received(self, exc):
+        if not self.reply.done():
+            self.reply.set_exception(exc)
+    def connection_lost(self, exc):
+        if not self.reply.done():
+            self.reply.set_exception(exc or ConnectionError("NTP socket closed"))
+
+async def _query_ntp_async(server, port=123, timeout=NTP_TIMEOUT):
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(_NTPClientProtocol, remote_addr=(server, port))
+    deadline = loop.time() + timeout
     try:
-        verbose_log(f"Fetching time from {server}:{port}", level="INFO")
-        client = ntplib.NTPClient()
-        response = client.request(server, port=port, version=3)
-        ntp_time = datetime.fromtimestamp(response.tx_time, tz=timezone.utc)
-        local_time = datetime.now(tz=timezone.utc)
-        offset = (ntp_time - local_time).total_seconds()
-        verbose_log(f"NTP time: {ntp_time}", level="SUCCESS")
-        verbose_log(f"Local time: {local_time}", level="INFO")
-        verbose_log(f"Offset: {offset:.3f} seconds", level="INFO")
-        return {
-            'ntp_time': ntp_time,
-            'local_time': local_time,
-            'offset': offset,
-            'tx_time': response.tx_time
-        }
+        while True:
+            orig_time = time.time()
+            transport.sendto(_ntp_request(orig_time))
+            remaining = deadline - loop.time()
+            try:
+                data, dest_time, dest_mono_ns = await asyncio.wait_for(asyncio.shield(protocol.reply), max(0.0, min(NTP_RETRY_INTERVAL, remaining)))
+                break
+            except asyncio.TimeoutError:
+                if remaining <= NTP_RETRY_INTERVAL:
+                    raise asyncio.TimeoutError(f"no NTP reply within {timeout:.1f}s") from None
+                verbose_log("No NTP reply from %s:%s after %.1fs; resending", server, port, NTP_RETRY_INTERVAL, level="WARNING")
+    finally:
+        # Settle the reply future so closing the socket doesn't leave an unretrieved exception
+        protocol.reply.cancel()
+        transport.close()
+    return _parse_ntp_packet(data, orig_time, dest_time), dest_mono_ns
+
+def _query_ntplib(server, port=123, timeout=NTP_TIMEOUT):
+    client = ntplib.NTPClient()
+    response = client.request(server, port=port, version=3, timeout=timeout)
+    return response, time.monotonic_ns()
+
+def _ntp_time_info(server, port, response, dest_mono_ns, max_delay=NTP_MAX_DELAY):
+    # Symmetric NTP offset/delay: T1=orig, T2=recv, T3=tx, T4=dest
+    offset = ((response.recv_time - response.orig_time) + (response.tx_time - response.dest_time)) / 2.0
+    delay = (response.dest_time - response.orig_time) - (response.tx_time - response.recv_time)
+    if delay > max_delay:
+        verbose_log("Rejecting NTP sample from %s:%s: delay %.3fs exceeds %.3fs", server, port, delay, max_delay, level="WARNING")
+        return None
+    # fromtimestamp is faster here than epoch + timedelta arithmetic
+    ntp_time = datetime.fromtimestamp(response.dest_time + offset, tz=timezone.utc)
+    local_time = datetime.fromtimestamp(response.dest_time, tz=timezone.utc)
+    verbose_log("NTP time: %s", ntp_time, level="SUCCESS")
+    verbose_log("Local time: %s", local_time, level="INFO")
+    verbose_log("Offset: %.3f seconds", offset, level="INFO")
+    verbose_log("Delay: %.3f seconds", delay, level="INFO")
+    return {
+        'ntp_time': ntp_time,
+        'local_time': local_time,
+        'offset': offset,
+        'delay': delay,
+        'tx_time': response.tx_time,
+        # Monotonic reading at T4, the instant ntp_time refers to
+        'dest_mono_ns': dest_mono_ns
+    }
+
+async def _get_ntp_time_async(server, port=123, timeout=NTP_TIMEOUT, max_delay=NTP_MAX_DELAY, executor=None):
+    try:
+        verbose_log("Fetching time from %s:%s", server, port, level="INFO")
+        response = None
+        if USE_RAW_NTP:
+            try:
+                response, dest_mono_ns = await _query_ntp_async(server, port, timeout)
+            except ValueError as e:
+                verbose_log("Unexpected NTP reply from %s:%s (%s); retrying with ntplib", server, port, e, level="WARNING")
+        if response is None:
+            loop = asyncio.get_running_loop()
+            response, dest_mono_ns = await loop.run_in_executor(executor, _query_ntplib, server, port, timeout)
+        return _ntp_time_info(server, port, response, dest_mono_ns, max_delay)
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         if VERBOSE and not QUIET:
-            error_log(f"Failed to fetch NTP time from {server}:{port} - {e}")
+            error_log("Failed to fetch NTP time from %s:%s - %s", server, port, e)
         return None
 
+async def _get_ntp_time_fastest_async(servers, port=123, executor=None):
+    pending = {asyncio.ensure_future(_get_ntp_time_async(server, port, executor=executor)): server for server in servers}
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                server = pending.pop(task)
+                time_info = task.result()
+                if time_info is not None:
+                    verbose_log("Using NTP response from %s:%s", server, port, level="SUCCESS")
+                    return time_info
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+def _run_ntp_queries(make_coro, workers):
+    # ntplib queries run on this executor (threads start only if it is used);
+    # asyncio.run would wait for its default executor, this one is not waited on
+    # since slower servers are bounded by NTP_TIMEOUT
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        return asyncio.run(make_coro(executor))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def get_ntp_time(server, port=123, timeout=NTP_TIMEOUT, max_delay=NTP_MAX_DELAY):
+    return _run_ntp_queries(lambda executor: _get_ntp_time_async(server, port, timeout, max_delay, executor), 1)
+
+def get_ntp_time_fastest(servers, port=123):
+    # Query all servers concurrently on one event loop and keep the first valid answer
+    servers = list(servers)
+    if not servers:
+        return None
+    return _run_ntp_queries(lambda executor: _get_ntp_time_fastest_async(servers, port, executor), len(servers))
+
 def print_cross_platform_tips(server, port, time_info):
     if QUIET:
         return
     system = platform.system()
-    print(f"\n{Colors.YELLOW}=== Cross-Platform Time Sync Information ==={Colors.END}")
-    print(f"Target Server: {server}:{port}")
-    print(f"Server Time: {time_info['ntp_time']}")
-    print(f"Local Time: {time_info['local_time']}")
-    print(f"Offset: {time_info['offset']:.3f} seconds")
+    buf = io.StringIO()
+    buf.write(f"\n{_C_YELLOW}=== Cross-Platform Time Sync Information ==={_C_END}\n")
+    buf.write(f"Target Server: {server}:{port}\n")
+    buf.write(f"Server Time: {time_info['ntp_time']}\n")
+    buf.write(f"Local Time: {time_info['local_time']}\n")
+    buf.write(f"Offset: {time_info['offset']:.3f} seconds\n")
     if system == "Windows":
-        print(f"\n{Colors.CYAN}Windows Manual Sync:{Colors.END}")
-        print(f"1. Run as Administrator:")
-        print(f"   w32tm /config /manualpeerlist:\"{server}\" /syncfromflags:manual")
-        print(f"   w32tm /resync")
-        print(f"2. Or use GUI: Date & Time Settings > Additional date, time, & regional settings")
+        buf.write(f"\n{_C_CYAN}Windows Manual Sync:{_C_END}\n"
+                  "1. Run as Administrator:\n"
+                  f"   w32tm /config /manualpeerlist:\"{server}\" /syncfromflags:manual\n"
+                  "   w32tm /resync\n"
+                  "2. Or use GUI: Date & Time Settings > Additional date, time, & regional settings\n")
     elif system == "Darwin":
-        print(f"\n{Colors.CYAN}macOS Manual Sync:{Colors.END}")
-        print(f"1. System Preferences > Date & Time")
-        print(f"2. Uncheck 'Set date and time automatically'")
-        print(f"3. Manually set to: {time_info['ntp_time'].strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"4. Or use terminal: sudo sntp -sS {server}")
-    print(f"\n{Colors.RED}OPSEC Note:{Colors.END} Manual time changes may be logged by the system")
+        buf.write(f"\n{_C_CYAN}macOS Manual Sync:{_C_END}\n"
+                  "1. System Preferences > Date & Time\n"
+                  "2. Uncheck 'Set date and time automatically'\n"
+                  f"3. Manually set to: {time_info['ntp_time'].strftime('%Y-%m-%d %H:%M:%S')}\n"
+                  f"4. Or use terminal: sudo sntp -sS {server}\n")
+    buf.write(f"\n{_C_RED}OPSEC Note:{_C_END} Manual time changes may be logged by the system\n")
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
 
 # =========================
 # Technique Classes
@@ -252,38 +597,57 @@ class TimeSyncTechnique:
         self.supports_shell = supports_shell
         self.active = False
         self.last_error = None
-    def is_available(self): raise NotImplementedError
+        # Set where a command reports that systemd is not running (containers)
+        self.no_systemd = False
+        self._available = None
+        self._avail_error = None
+    def is_available(self):
+        # The probe result cannot change during a run, so it is computed once
+        if self._available is None:
+            self._available = self._check_available()
+            self._avail_error = self.last_error
+        elif not self._available:
+            self.last_error = self._avail_error
+        return self._available
+    def _check_available(self): raise NotImplementedError
     def sync_time(self, server, port=123): raise NotImplementedError
     def reset(self): pass
+    def needs_reset(self): return True
+    def _command_failed(self, message, result):
+        if _reports_no_systemd(result):
+            self.no_systemd = True
+        self.last_error = _command_error(message, result)
 
 class NTPDateTechnique(TimeSyncTechnique):
     def __init__(self):
         super().__init__("ntpdate", 1, supports_custom_port=False, needs_config=False, needs_service=False, supports_shell=False)
-    def is_available(self):
-        if shutil.which("ntpdate") is None:
-            self.last_error = "ntpdate not found in PATH"
-            return False
-        if not is_linux():
+    def _check_available(self):
+        if not _IS_LINUX:
             self.last_error = "ntpdate is only supported on Linux"
             return False
+        if _which("ntpdate") is None:
+            self.last_error = "ntpdate not found in PATH"
+            return False
         return True
     def sync_time(self, server, port=123):
         try:
-            result = run_command(["timedatectl", "set-ntp", "off"], check=False, capture_output=True, verbose_cmd=True)
+            result = run_command(_CMD_TIMEDATECTL_OFF, check=False, capture_output=True, verbose_cmd=True)
+            # Only a warning: no_systemd is decided by the ntpdate result below
             if result is not None and result.returncode != 0:
-                warning_log("Could not disable system NTP: " + (result.stderr.strip() if result.stderr else "Unknown error"))
+                warning_log("Could not disable system NTP: %s", result.stderr.strip() if result.stderr else "Unknown error")
                 warning_log("Note: The ntpdate technique is temporary and system time may be reset at any time by the OS or background services.")
         except Exception as e:
-            warning_log(f"Could not disable system NTP: {e}")
+            warning_log("Could not disable system NTP: %s", e)
             warning_log("Note: The ntpdate technique is temporary and system time may be reset at any time by the OS or background services.")
-        if not is_root():
+        if not _IS_ROOT:
             self.last_error = "Root required for ntpdate"
             return False
         if port != 123:
             self.last_error = "ntpdate does not support custom ports"
         result = run_command(["ntpdate", "-u", server], capture_output=True, verbose_cmd=True)
         if result is None or result.returncode != 0:
-            if result and result.stderr and "System has not been booted with systemd" in result.stderr:
+            if _reports_no_systemd(result):
+                self.no_systemd = True
                 self.last_error = "Systemd is not available (container or minimal OS). Technique not supported."
             else:
                 self.last_error = "ntpdate command failed"
@@ -291,199 +655,236 @@ class NTPDateTechnique(TimeSyncTechnique):
         self.active = True
         return True
     def reset(self):
-        run_command(["timedatectl", "set-ntp", "true"], check=False, capture_output=True, verbose_cmd=True)
+        run_command(_CMD_TIMEDATECTL_ON, check=False, capture_output=True, verbose_cmd=True)
 
 class NTPDTechnique(TimeSyncTechnique):
     def __init__(self):
         super().__init__("ntpd", 2, supports_custom_port=False, needs_config=True, needs_service=True, supports_shell=True)
         self.config_file = "/etc/ntp.conf"
-    def is_available(self):
-        if shutil.which("ntpd") is None:
-            self.last_error = "ntpd not found in PATH"
-            return False
-        if not is_linux():
+        self._template = "server {server} iburst\n"
+    def _check_available(self):
+        if not _IS_LINUX:
             self.last_error = "ntpd is only supported on Linux"
             return False
+        if _which("ntpd") is None:
+            self.last_error = "ntpd not found in PATH"
+            return False
         return True
     def sync_time(self, server, port=123):
-        if not is_root():
+        if not _IS_ROOT:
             self.last_error = "Root required for ntpd"
             return False
         if port != 123:
             self.last_error = "ntpd does not support custom ports"
         backup_file(self.config_file)
-        conf_content = f"server {server} iburst\n"
+        conf_content = self._template.format(server=server)
         try:
-            with open(self.config_file, "w") as f:
-                f.write(conf_content)
+            changed = _write_if_changed(self.config_file, conf_content)
         except Exception as e:
             self.last_error = f"Failed to write ntpd config: {e}"
             return False
         # Run the actual service commands and check for errors
-        result1 = run_command(["systemctl", "restart", "ntp"], capture_output=True, verbose_cmd=True)
-        if result1 is None or result1.returncode != 0:
-            self.last_error = "systemctl restart ntp failed"
-            return False
-        result2 = run_command(["systemctl", "enable", "ntp"], capture_output=True, verbose_cmd=True)
-        if result2 is None or result2.returncode != 0:
-            self.last_error = "systemctl enable ntp failed"
+        step, result = _start_service("ntp", changed)
+        if result is None or result.returncode != 0:
+            self._command_failed(f"{step} failed", result)
             return False
         self.active = True
         return True
     def reset(self):
-        run_command(["timedatectl", "set-ntp", "true"], check=False, capture_output=True, verbose_cmd=True)
+        run_command(_CMD_TIMEDATECTL_ON, check=False, capture_output=True, verbose_cmd=True)
         restore_file(self.config_file)
 
 class SystemdTimesyncTechnique(TimeSyncTechnique):
     def __init__(self):
         super().__init__("systemd-timesyncd", 3, supports_custom_port=False, needs_config=True, needs_service=True, supports_shell=True)
         self.config_file = "/etc/systemd/timesyncd.conf"
-    def is_available(self):
-        if not os.path.exists("/lib/systemd/systemd-timesyncd"):
-            self.last_error = "systemd-timesyncd not found"
-            return False
-        if not is_linux():
+        self._template = "[Time]\nNTP={server}\nFallbackNTP={fallback}\n"
+    def _check_available(self):
+        if not _IS_LINUX:
             self.last_error = "systemd-timesyncd is only supported on Linux"
             return False
+        if not _path_exists("/lib/systemd/systemd-timesyncd"):
+            self.last_error = "systemd-timesyncd not found"
+            return False
         return True
     def sync_time(self, server, port=123):
-        if not is_root():
+        if not _IS_ROOT:
             self.last_error = "Root required for systemd-timesyncd"
             return False
         if port != 123:
             self.last_error = "systemd-timesyncd does not support custom ports"
         backup_file(self.config_file)
-        config_content = f"[Time]\nNTP={server}\nFallbackNTP={' '.join(DEFAULT_NTP_SERVERS)}\n"
+        config_content = self._template.format(server=server, fallback=_DEFAULT_FALLBACK_LINE)
         try:
             os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w') as f:
-                f.write(config_content)
+            changed = _write_if_changed(self.config_file, config_content)
         except Exception as e:
             self.last_error = f"Failed to write timesyncd config: {e}"
             return False
         # Run the actual service commands and check for errors
-        result1 = run_command(["systemctl", "enable", "systemd-timesyncd"], capture_output=True, verbose_cmd=True)
-        if result1 is None or result1.returncode != 0:
-            self.last_error = "systemctl enable systemd-timesyncd failed"
-            return False
-        result2 = run_command(["systemctl", "restart", "systemd-timesyncd"], capture_output=True, verbose_cmd=True)
-        if result2 is None or result2.returncode != 0:
-            self.last_error = "systemctl restart systemd-timesyncd failed"
-            return False
-        result3 = run_command(["timedatectl", "set-ntp", "true"], capture_output=True, verbose_cmd=True)
-        if result3 is None or result3.returncode != 0:
-            self.last_error = "timedatectl set-ntp true failed"
+        step, result = _start_service("systemd-timesyncd", changed)
+        if result is None or result.returncode != 0:
+            self._command_failed(f"{step} failed", result)
             return False
+        state = run_command(_CMD_TIMEDATECTL_NTP_STATE, check=False, capture_output=True, verbose_cmd=True)
+        if state is None or state.returncode != 0 or state.stdout.strip() != "yes":
+            result = run_command(_CMD_TIMEDATECTL_ON, check=False, capture_output=True, verbose_cmd=True)
+            if result is None or result.returncode != 0:
+                self._command_failed("timedatectl set-ntp true failed", result)
+                return False
         self.active = True
         return True
     def reset(self):
-        run_command(["timedatectl", "set-ntp", "true"], check=False, capture_output=True, verbose_cmd=True)
+        run_command(_CMD_TIMEDATECTL_ON, check=False, capture_output=True, verbose_cmd=True)
         restore_file(self.config_file)
 
 class OpenNTPDTechnique(TimeSyncTechnique):
     def __init__(self):
         super().__init__("openntpd", 4, supports_custom_port=False, needs_config=True, needs_service=True, supports_shell=True)
         self.config_file = "/etc/openntpd/ntpd.conf"
-    def is_available(self):
-        if not shutil.which("ntpd") or not os.path.exists("/etc/openntpd"):
-            self.last_error = "openntpd not found"
-            return False
-        if not is_linux():
+        self._template = "servers {server}\n"
+    def _check_available(self):
+        if not _IS_LINUX:
             self.last_error = "openntpd is only supported on Linux"
             return False
+        if not _which("ntpd") or not _path_exists("/etc/openntpd"):
+            self.last_error = "openntpd not found"
+            return False
         return True
     def sync_time(self, server, port=123):
-        if not is_root():
+        if not _IS_ROOT:
             self.last_error = "Root required for openntpd"
             return False
         if port != 123:
             self.last_error = "openntpd does not support custom ports"
         backup_file(self.config_file)
-        config_content = f"servers {server}\n"
+        config_content = self._template.format(server=server)
         try:
             os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w') as f:
-                f.write(config_content)
+            changed = _write_if_changed(self.config_file, config_content)
         except Exception as e:
             self.last_error = f"Failed to write openntpd config: {e}"
             return False
         # Run the actual service commands and check for errors
-        result1 = run_command(["systemctl", "restart", "openntpd"], capture_output=True, verbose_cmd=True)
-        if result1 is None or result1.returncode != 0:
-            self.last_error = "systemctl restart openntpd failed"
-            return False
-        result2 = run_command(["systemctl", "enable", "openntpd"], capture_output=True, verbose_cmd=True)
-        if result2 is None or result2.returncode != 0:
-            self.last_error = "systemctl enable openntpd failed"
+        step, result = _start_service("openntpd", changed)
+        if result is None or result.returncode != 0:
+            self._command_failed(f"{step} failed", result)
             return False
         self.active = True
         return True
     def reset(self):
-        run_command(["timedatectl", "set-ntp", "true"], check=False, capture_output=True, verbose_cmd=True)
+        run_command(_CMD_TIMEDATECTL_ON, check=False, capture_output=True, verbose_cmd=True)
         restore_file(self.config_file)
 
 class DynamicDateLoopTechnique(TimeSyncTechnique):
     def __init__(self):
         super().__init__("Dynamic Date Loop", 5, supports_custom_port=True, needs_config=False, needs_service=False, supports_shell=True)
         self._reset_needed = False
-    def is_available(self):
-        if not is_linux():
+    def _check_available(self):
+        if not _IS_LINUX:
             self.last_error = "Dynamic Date Loop is only supported on Linux"
             return False
-        if not is_root():
+        if not _IS_ROOT:
             self.last_error = "Root required for Dynamic Date Loop"
             return False
         return True
     def sync_time(self, server, port=123):
-        vntp = get_virtual_ntp_time()
-        if not vntp:
+        vntp = get_virtual_ntp_timestamp()
+        if vntp is None:
             self.last_error = "No virtual NTP time available"
             return False
-        timestamp = int(vntp.timestamp())
-        result = run_command(["date", "-s", f"@{timestamp}"], capture_output=True, verbose_cmd=True)
-        if result is None or result.returncode != 0:
-            self.last_error = "date command failed"
+        if not self._set_clock(vntp):
             return False
         self.active = True
         self._reset_needed = True
         return True
+    def _set_clock(self, vntp):
+        # Set CLOCK_REALTIME directly; fall back to date(1) where the
+        # syscall wrapper is unavailable
+        if hasattr(time, "clock_settime_ns"):
+            try:
+                time.clock_settime_ns(time.CLOCK_REALTIME, int(vntp * 1e9))
+                verbose_log("Set CLOCK_REALTIME to %.6f", vntp, level="SUCCESS")
+                return True
+            except OSError as e:
+                verbose_log("clock_settime failed (errno=%s); falling back to date", e.errno, level="WARNING")
+        result = run_command(["date", "-s", f"@{int(vntp)}"], capture_output=True, verbose_cmd=True)
+        if result is None or result.returncode != 0:
+            self.last_error = "date command failed"
+            return False
+        return True
+    def needs_reset(self):
+        return self._reset_needed
     def reset(self):
         if self._reset_needed:
-            run_command(["timedatectl", "set-ntp", "true"], check=False, capture_output=True, verbose_cmd=True)
+            run_command(_CMD_TIMEDATECTL_ON, check=False, capture_output=True, verbose_cmd=True)
             self._reset_needed = False
 
 class FaketimeTechnique(TimeSyncTechnique):
     def __init__(self):
         super().__init__("faketime", 6, supports_custom_port=True, needs_config=False, needs_service=False, supports_shell=True)
         self.faketime_str = None
-    def is_available(self):
-        if shutil.which("faketime") is None:
+    def _check_available(self):
+        if _which("faketime") is None:
             self.last_error = "faketime not found in PATH"
             return False
         return True
     def sync_time(self, server, port=123):
-        vntp = get_virtual_ntp_time()
-        if not vntp:
+        vntp = get_virtual_ntp_timestamp()
+        if vntp is None:
             self.last_error = "No virtual NTP time available"
             return False
-        self.faketime_str = f"@{int(vntp.timestamp())}"
+        self.faketime_str = f"@{int(vntp)}"
         self.active = True
         return True
     def reset(self):
         pass
+    def needs_reset(self):
+        return False
+
+# Techniques that can never be available off Linux; not instantiated there
+LINUX_ONLY_TECHNIQUES = (
+    NTPDateTechnique, NTPDTechnique, SystemdTimesyncTechnique,
+    OpenNTPDTechnique, DynamicDateLoopTechnique
+)
 
 # =========================
 # DCTimer Class and Main Entrypoint
 # =========================
 class DCTimer:
     def __init__(self):
-        self.techniques = [
-            NTPDateTechnique(), NTPDTechnique(), SystemdTimesyncTechnique(),
-            OpenNTPDTechnique(), DynamicDateLoopTechnique(), FaketimeTechnique()
-        ]
+        # Technique instances are created on first use; a forced technique (-t N)
+        # never constructs the others
+        self._technique_classes = (
+            NTPDateTechnique, NTPDTechnique, SystemdTimesyncTechnique,
+            OpenNTPDTechnique, DynamicDateLoopTechnique, FaketimeTechnique
+        )
+        self._instances = {}
         self.active_technique = None
         self.failed_techniques = []
 
+    def _technique(self, cls):
+        tech = self._instances.get(cls)
+        if tech is None:
+            tech = self._instances[cls] = cls()
+        return tech
+
+    @functools.cached_property
+    def techniques(self):
+        return [self._technique(cls) for cls in self._technique_classes if _IS_LINUX or cls not in LINUX_ONLY_TECHNIQUES]
+
+    def _select_techniques(self, technique_num=None):
+        if technique_num is None:
+            return self.techniques
+        # Classes are listed in technique-number order
+        classes = self._technique_classes[technique_num-1:technique_num] if technique_num >= 1 else ()
+        return [self._technique(cls) for cls in classes if _IS_LINUX or cls not in LINUX_ONLY_TECHNIQUES]
+
+    def prewarm(self, technique_num=None):
+        # Fill the availability cache; main runs this while the NTP fetch is in flight
+        for tech in self._select_techniques(technique_num):
+            tech.is_available()
+
     def get_target_ip(self, args):
         if args.ip: return args.ip
         ip = get_env_ip()
@@ -493,39 +894,51 @@ class DCTimer:
 
     def validate_port(self, port):
         if not (1 <= port <= 65535):
-            error_log(f"Invalid port {port}. Must be between 1 and 65535")
+            error_log("Invalid port %s. Must be between 1 and 65535", port)
             sys.exit(1)
         return port
 
+    def _log_tech_failure(self, tech, context, default):
+        error = tech.last_error
+        # Container/Non-systemd detection
+        if tech.no_systemd:
+            if VERBOSE and not QUIET:
+                warning_log("This command cannot run in a container or system without systemd (such as many Docker containers).")
+                warning_log("Techniques 1, 2, 3, 4, 5, and 7 do not work in container-like systems.")
+        elif error:
+            verbose_log("Technique %s %s %s: %s", tech.number, tech.name, context, error, level="WARNING")
+        self.failed_techniques.append((tech, error or default))
+
+    def _try_sync(self, tech, server, port):
+        verbose_log("Trying technique %s: %s", tech.number, tech.name, level="INFO")
+        if tech.sync_time(server, port):
+            self.active_technique = tech
+            return True
+        self._log_tech_failure(tech, "failed", "Unknown error")
+        return False
+
     def try_techniques(self, server, port, technique_num=None):
         self.failed_techniques = []
         if technique_num == 7:
             error_log("Technique 7 (Python monkey-patch) is not currently supported. This feature will be added in a future update.")
             sys.exit(1)
-        techniques_to_try = self.techniques if technique_num is None else [self.techniques[technique_num-1]]
+        techniques_to_try = self._select_techniques(technique_num)
+        if technique_num is not None:
+            # A single forced technique: probe it directly and stop if unavailable
+            if not techniques_to_try:
+                return False
+            tech = techniques_to_try[0]
+            if not tech.is_available():
+                self._log_tech_failure(tech, "not available", "Not available")
+                return False
+            return self._try_sync(tech, server, port)
+        # main has already probed availability via prewarm, so these are cached
+        # reads; sync_time changes system state and stays serial, in priority order
         for tech in techniques_to_try:
-            if tech.is_available():
-                verbose_log(f"Trying technique {tech.number}: {tech.name}", level="INFO")
-                if tech.sync_time(server, port):
-                    self.active_technique = tech
-                    return True
-                else:
-                    # Container/Non-systemd detection
-                    if tech.last_error and "System has not been booted with systemd" in tech.last_error:
-                        if VERBOSE and not QUIET:
-                            warning_log("This command cannot run in a container or system without systemd (such as many Docker containers).")
-                            warning_log("Techniques 1, 2, 3, 4, 5, and 7 do not work in container-like systems.")
-                    elif tech.last_error:
-                        verbose_log(f"Technique {tech.number} {tech.name} failed: {tech.last_error}", level="WARNING")
-                    self.failed_techniques.append((tech, tech.last_error or "Unknown error"))
-            else:
-                if tech.last_error and "System has not been booted with systemd" in tech.last_error:
-                    if VERBOSE and not QUIET:
-                        warning_log("This command cannot run in a container or system without systemd (such as many Docker containers).")
-                        warning_log("Techniques 1, 2, 3, 4, 5, and 7 do not work in container-like systems.")
-                elif tech.last_error:
-                    verbose_log(f"Technique {tech.number} {tech.name} not available: {tech.last_error}", level="WARNING")
-                self.failed_techniques.append((tech, tech.last_error or "Not available"))
+            if not tech.is_available():
+                self._log_tech_failure(tech, "not available", "Not available")
+            elif self._try_sync(tech, server, port):
+                return True
         return False
 
     def print_failure_matrix(self):
@@ -544,16 +957,32 @@ class DCTimer:
         print(f"Used Technique {tech.number}: {tech.name}")
 
     def reset_all(self):
-        if not is_linux():
+        if not _IS_LINUX:
             error_log("Reset functionality is only available on Linux")
             return
-        if not is_root():
+        if not _IS_ROOT:
             error_log("Root privileges required for reset")
             return
         info_log("Performing universal time sync reset (timedatectl set-ntp true)...")
-        run_command(["timedatectl", "set-ntp", "true"], check=False, capture_output=not QUIET)
         info_log("Synchronizing with public NTP server (ntpdate pool.ntp.org)...")
-        run_command(["ntpdate", "pool.ntp.org"], check=False, capture_output=not QUIET)
+        # Independent steps (ntpdate is a one-shot clock step), so run them side by side
+        reset_commands = {
+            "timedatectl set-ntp true": _CMD_TIMEDATECTL_ON,
+            "ntpdate pool.ntp.org": ("ntpdate", "pool.ntp.org"),
+        }
+        with ThreadPoolExecutor(max_workers=len(reset_commands)) as executor:
+            futures = {
+                executor.submit(run_command, cmd, check=False, capture_output=not QUIET): name
+                for name, cmd in reset_commands.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                except OSError as e:
+                    warning_log("Could not run %s: %s", name, e)
+                    continue
+                verbose_log("%s finished with exit code %s", name, result.returncode, level="INFO")
         success_log("Universal time sync restored (timedatectl set-ntp true; ntpdate pool.ntp.org).")
         if not QUIET:
             print("\nAdditional notes for manual restoration:")
@@ -565,7 +994,7 @@ class DCTimer:
             print("  - For ntpdate: system time should be reset by universal restore.")
             print("  - Technique 7 (Python monkey-patch) is not currently supported.")
 
-    def execute_command(self, command, server, port, technique_num=None):
+    def execute_command(self, argv, server, port, technique_num=None):
         try:
             if not self.try_techniques(server, port, technique_num):
                 self.print_failure_matrix()
@@ -580,29 +1009,21 @@ class DCTimer:
             if isinstance(tech, FaketimeTechnique):
                 if tech.faketime_str:
                     try:
-                        cmd_args = shlex.split(command)
+                        # argv comes straight from the command line; a single argument is a
+                        # quoted command line ("nxc ldap ...") and still needs splitting
+                        cmd_args = list(argv) if len(argv) > 1 else shlex.split(argv[0])
                         cmd_list = ["faketime", tech.faketime_str] + cmd_args
                         if VERBOSE and not QUIET:
-                            verbose_log(f"Running command: {Colors.MAGENTA}{' '.join(shlex.quote(arg) for arg in cmd_list)}{Colors.END}", level="CMD")
-                        result = subprocess.run(cmd_list, env=os.environ.copy(), capture_output=True, text=True)
-                        if QUIET:
-                            if result.stdout:
-                                print(result.stdout, end="")
-                            if result.stderr:
-                                print(result.stderr, end="", file=sys.stderr)
-                        else:
-                            if result.stdout:
-                                print(result.stdout, end="")
-                            if result.stderr:
-                                print(result.stderr, end="", file=sys.stderr)
-                                if "faketime: Running specified command failed: No such file or directory" in result.stderr and VERBOSE:
-                                    verbose_log("Note: This faketime error often means the command you provided is invalid or not found. Please check your command.", level="WARNING")
-                            if result.returncode != 0 and not QUIET:
-                                error_log(f"Command failed with exit code {result.returncode}")
-                        return result.returncode
+                            verbose_log("Running command: %s%s%s", _C_MAGENTA, _fmt_cmd(tuple(cmd_list)), _C_END, level="CMD")
+                        returncode, stderr_tail = _run_with_stderr_tail(cmd_list)
+                        if VERBOSE and b"faketime: Running specified command failed: No such file or directory" in stderr_tail:
+                            verbose_log("Note: This faketime error often means the command you provided is invalid or not found. Please check your command.", level="WARNING")
+                        if returncode != 0 and not QUIET:
+                            error_log("Command failed with exit code %s", returncode)
+                        return returncode
                     except Exception as e:
                         if VERBOSE and not QUIET:
-                            error_log(f"Error executing command with faketime: {e}")
+                            error_log("Error executing command with faketime: %s", e)
                         if not QUIET:
                             error_log("Failed to execute command with faketime.")
                         return 1
@@ -612,25 +1033,32 @@ class DCTimer:
                     return 1
             else:
                 try:
+                    cmd_args = _user_command_argv(argv)
+                    if cmd_args is None:
+                        command = ' '.join(argv)
+                    elif not cmd_args:
+                        verbose_log("Empty command, nothing to run", level="WARNING")
+                        return 0
                     if VERBOSE and not QUIET:
-                        verbose_log(f"Running command: {Colors.MAGENTA}{command}{Colors.END}", level="CMD")
-                    result = subprocess.run(command, shell=True, env=os.environ.copy(), capture_output=True, text=True)
-                    if QUIET:
-                        if result.stdout:
-                            print(result.stdout, end="")
-                        if result.stderr:
-                            print(result.stderr, end="", file=sys.stderr)
+                        shown = command if cmd_args is None else _fmt_cmd(tuple(cmd_args))
+                        verbose_log("Running command: %s%s%s", _C_MAGENTA, shown, _C_END, level="CMD")
+                    # The child inherits our stdout/stderr; nothing is captured or re-printed
+                    sys.stdout.flush()
+                    if cmd_args is None:
+                        result = subprocess.run(command, shell=True)
                     else:
-                        if result.stdout:
-                            print(result.stdout, end="")
-                        if result.stderr:
-                            print(result.stderr, end="", file=sys.stderr)
-                        if result.returncode != 0 and not QUIET:
-                            error_log(f"Command failed with exit code {result.returncode}")
+                        result = subprocess.run(cmd_args)
+                    if result.returncode != 0 and not QUIET:
+                        error_log("Command failed with exit code %s", result.returncode)
                     return result.returncode
+                except FileNotFoundError:
+                    # Same status /bin/sh reports for an unknown command
+                    if not QUIET:
+                        error_log("Command not found: %s", cmd_args[0] if cmd_args else "/bin/sh")
+                    return 127
                 except Exception as e:
                     if VERBOSE and not QUIET:
-                        error_log(f"Error executing command: {e}")
+                        error_log("Error executing command: %s", e)
                     if not QUIET:
                         error_log("Failed to execute command.")
                     return 1
@@ -639,7 +1067,7 @@ class DCTimer:
                 self.active_technique.reset()
 
     def shell_mode(self, shell_name=None, technique_num=None, server=None, port=None):
-        if not is_linux():
+        if not _IS_LINUX:
             error_log("Shell mode is only supported on Linux/Unix.")
             sys.exit(1)
         shell_path = shell_name
@@ -648,7 +1076,7 @@ class DCTimer:
         elif shell_path in ("bash", "zsh", "sh"):
             shell_path = shutil.which(shell_path) or shell_path
         if not shell_path or not os.path.exists(shell_path):
-            error_log(f"Could not find shell: {shell_name or '$SHELL'}")
+            error_log("Could not find shell: %s", shell_name or '$SHELL')
             sys.exit(1)
         if technique_num == 7:
             error_log("Technique 7 (Python monkey-patch) is not currently supported. This feature will be added in a future update.")
@@ -663,59 +1091,97 @@ class DCTimer:
         if isinstance(tech, FaketimeTechnique) and tech.faketime_str:
             cmd_list = ["faketime", tech.faketime_str, shell_path]
             if VERBOSE and not QUIET:
-                verbose_log(f"Launching shell: {Colors.MAGENTA}{' '.join(shlex.quote(arg) for arg in cmd_list)}{Colors.END}", level="CMD")
-            subprocess.run(cmd_list, env=os.environ.copy())
+                verbose_log("Launching shell: %s%s%s", _C_MAGENTA, _fmt_cmd(tuple(cmd_list)), _C_END, level="CMD")
         else:
+            cmd_list = [shell_path]
             if VERBOSE and not QUIET:
-                verbose_log(f"Launching shell: {Colors.MAGENTA}{shell_path}{Colors.END}", level="CMD")
-            subprocess.run([shell_path], env=os.environ.copy())
+                verbose_log("Launching shell: %s%s%s", _C_MAGENTA, shell_path, _C_END, level="CMD")
+        if not tech.needs_reset():
+            # Nothing to undo once the shell exits, so replace this process with it
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.execvp(cmd_list[0], cmd_list)
+        subprocess.run(cmd_list)
         if self.active_technique:
             self.active_technique.reset()
 
 def signal_handler(signum, frame):
     if not QUIET:
-        print(f"\n{Colors.YELLOW}Interrupted by user{Colors.END}")
+        print(f"\n{_C_YELLOW}Interrupted by user{_C_END}")
     sys.exit(0)
 
+_HELP_SCRIPT_NAME = "DCTimer.py"
+# Joined once at import; print_help() fills in the current colors and emits it
+# with a single write, so --colorless applies here too
+_HELP_TEXT = "\n".join([
+    "{B}DCTimer: Red Team Time Synchronization Tool{E}",
+    "Synchronize system or process time with a Domain Controller (DC) or NTP server.",
+    "",
+    "="*20 + " USAGE " + "="*20,
+    "{C}{prog} -i <IP> [OPTIONS] [COMMAND...]{E}",
+    "",
+    "="*19 + " OPTIONS " + "="*19,
+    "  {B}-i, --ip IP{E}\t\tDC/NTP server IP address (or use 'IP' env var).",
+    "  {B}-p, --port PORT{E}\t\tUDP port for NTP queries (Default: 123).",
+    "  {B}-t, --technique TECH{E}\tForce a specific time sync technique (1-6).",
+    "  {B}-q, --quiet{E}\t\tQuiet mode: only print command output.",
+    "  {B}-s, --shell [SHELL]{E}\tQuick shell mode: open DC-synced shell (bash, zsh, sh, or $SHELL).",
+    "  {B}--colorless{E}\t\t\tDisable colored output (for piping).",
+    "  {B}--reset{E}\t\t\tReset all applied time changes (Linux only, requires root).",
+    "  {B}-v, --verbose{E}\t\tEnable verbose output for debugging.",
+    "  {B}-h, --help{E}\t\tShow this help message and exit.",
+    "",
+    "="*18 + " TECHNIQUES " + "="*17,
+    "  1: ntpdate\t\t(System-wide, one-shot, requires root)",
+    "  2: ntpd\t\t\t(System-wide, persistent service, requires root)",
+    "  3: systemd-timesyncd\t(System-wide, persistent service, requires root)",
+    "  4: openntpd\t\t(System-wide, persistent service, requires root)",
+    "  5: Dynamic Date Loop\t(System-wide, persistent loop, requires root)",
+    "  6: faketime\t\t(Process-level, for specific commands, no root needed)",
+    "  7: Python monkey-patch\t(NOT SUPPORTED YET - future update)",
+    "",
+    "="*19 + " EXAMPLES " + "="*18,
+    "{G}# Run 'date' and print only the output{E}",
+    "  {prog} -i $ip -q date",
+    "\n{G}# Open a bash shell with DC-synced time{E}",
+    "  {prog} -i $ip -s bash",
+    "\n{G}# Force use of ntpdate (T1) and run a command with verbose output{E}",
+    "  sudo {prog} -i $ip -t 1 -v \"nxc ldap dc.$host -u $user -p $pass -k -d $host\"",
+    "",
+    "",
+])
+
 def print_help():
-    script_name = "DCTimer.py"
-    print(f"\033[1mDCTimer: Red Team Time Synchronization Tool\033[0m")
-    print("Synchronize system or process time with a Domain Controller (DC) or NTP server.")
-    print()
-    print("="*20 + " USAGE " + "="*20)
-    print(f"\033[96m{script_name} -i <IP> [OPTIONS] [COMMAND...]\033[0m")
-    print()
-    print("="*19 + " OPTIONS " + "="*19)
-    print(f"  \033[1m-i, --ip IP\033[0m\t\tDC/NTP server IP address (or use 'IP' env var).")
-    print(f"  \033[1m-p, --port PORT\033[0m\t\tUDP port for NTP queries (Default: 123).")
-    print(f"  \033[1m-t, --technique TECH\033[0m\tForce a specific time sync technique (1-6).")
-    print(f"  \033[1m-q, --quiet\033[0m\t\tQuiet mode: only print command output.")
-    print(f"  \033[1m-s, --shell [SHELL]\033[0m\tQuick shell mode: open DC-synced shell (bash, zsh, sh, or $SHELL).")
-    print(f"  \033[1m--colorless\033[0m\t\t\tDisable colored output (for piping).")
-    print(f"  \033[1m--reset\033[0m\t\t\tReset all applied time changes (Linux only, requires root).")
-    print(f"  \033[1m-v, --verbose\033[0m\t\tEnable verbose output for debugging.")
-    print(f"  \033[1m-h, --help\033[0m\t\tShow this help message and exit.")
-    print()
-    print("="*18 + " TECHNIQUES " + "="*17)
-    print("  1: ntpdate\t\t(System-wide, one-shot, requires root)")
-    print("  2: ntpd\t\t\t(System-wide, persistent service, requires root)")
-    print("  3: systemd-timesyncd\t(System-wide, persistent service, requires root)")
-    print("  4: openntpd\t\t(System-wide, persistent service, requires root)")
-    print("  5: Dynamic Date Loop\t(System-wide, persistent loop, requires root)")
-    print("  6: faketime\t\t(Process-level, for specific commands, no root needed)")
-    print("  7: Python monkey-patch\t(NOT SUPPORTED YET - future update)")
-    print()
-    print("="*19 + " EXAMPLES " + "="*18)
-    print(f"\033[92m# Run 'date' and print only the output\033[0m")
-    print(f"  {script_name} -i $ip -q date")
-    print(f"\n\033[92m# Open a bash shell with DC-synced time\033[0m")
-    print(f"  {script_name} -i $ip -s bash")
-    print(f"\n\033[92m# Force use of ntpdate (T1) and run a command with verbose output\033[0m")
-    print(f"  sudo {script_name} -i $ip -t 1 -v \"nxc ldap dc.$host -u $user -p $pass -k -d $host\"")
-    print()
+    sys.stdout.write(_HELP_TEXT.format(prog=_HELP_SCRIPT_NAME, B=_C_BOLD, E=_C_END, C=_C_CYAN, G=_C_GREEN))
+    sys.stdout.flush()
 
-def main():
+# Flags that may accompany --reset on the fast path
+_RESET_FAST_FLAGS = frozenset(("--reset", "-v", "--verbose", "-q", "--quiet", "--colorless"))
+
+def _apply_output_flags(verbose, quiet, colorless):
     global VERBOSE, QUIET, COLORLESS
+    VERBOSE = verbose
+    QUIET = quiet
+    COLORLESS = colorless
+    if COLORLESS:
+        Colors.disable()
+    else:
+        Colors.enable()
+
+def main():
+    # Fast paths that don't need argparse; like argparse, stop scanning at "--"
+    argv = sys.argv[1:]
+    if "--" in argv:
+        argv = argv[:argv.index("--")]
+    if "-h" in argv or "--help" in argv:
+        _apply_output_flags(False, False, "--colorless" in argv)
+        print_help()
+        sys.exit(0)
+    if "--reset" in argv and _RESET_FAST_FLAGS.issuperset(argv):
+        _apply_output_flags("-v" in argv or "--verbose" in argv, "-q" in argv or "--quiet" in argv, "--colorless" in argv)
+        DCTimer().reset_all()
+        sys.exit(0)
+
     parser = argparse.ArgumentParser(description='DCTimer', add_help=False)
     parser.add_argument('-i', '--ip', help='DC/NTP server IP address')
     parser.add_argument('-p', '--port', type=int, default=DEFAULT_NTP_PORT, help='NTP port')
@@ -728,14 +1194,7 @@ def main():
     parser.add_argument('-h', '--help', action='store_true', help='Show help')
     args, remaining = parser.parse_known_args()
 
-    VERBOSE = args.verbose
-    QUIET = args.quiet
-    COLORLESS = args.colorless
-
-    if COLORLESS:
-        Colors.disable()
-    else:
-        Colors.enable()
+    _apply_output_flags(args.verbose, args.quiet, args.colorless)
 
     if args.help:
         print_help()
@@ -750,15 +1209,19 @@ def main():
     port = dctimer.validate_port(args.port)
     server = dctimer.get_target_ip(args)
 
-    ntp_info = get_ntp_time(server, port)
+    # The NTP round trip and the local technique probes are independent
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        ntp_future = executor.submit(get_ntp_time_fastest, [server], port)
+        dctimer.prewarm(args.technique)
+        ntp_info = ntp_future.result()
     if not ntp_info:
         if not QUIET:
             error_log("Failed to fetch initial NTP time. Exiting.")
         sys.exit(1)
 
-    update_ntp_reference(ntp_info['ntp_time'])
+    update_ntp_reference(ntp_info['ntp_time'], ntp_info['dest_mono_ns'])
 
-    if not is_linux():
+    if not _IS_LINUX:
         if not QUIET:
             warning_log("Full automation only available on Linux")
             print_cross_platform_tips(server, port, ntp_info)
@@ -771,14 +1234,12 @@ def main():
         dctimer.shell_mode(shell_name, args.technique, server, port)
         sys.exit(0)
 
-    command_str = ' '.join(remaining) if remaining else None
-
-    if not command_str:
+    if not any(remaining):
         if not QUIET:
             error_log("No command provided. Please specify a command to run.")
         sys.exit(1)
 
-    retcode = dctimer.execute_command(command_str, server, port, args.technique)
+    retcode = dctimer.execute_command(remaining, server, port, args.technique)
     sys.exit(retcode if retcode is not None else 1)
 
 if __name__ == "__main__":